@@ -1,74 +1,295 @@
+import base64
+import csv
+import gzip
 import io
 import os
 import datetime
-import pandas as pd
+import functools
+from python_calamine import CalamineWorkbook
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
+from google.auth.transport.requests import AuthorizedSession, Request as GoogleAuthRequest
 import json
+from types import SimpleNamespace
 import msoffcrypto
 import requests
 import requests.exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # --- 設定項目 (GitHubの環境変数から自動で読み込む) ---
-try:
-    # 1. Google Drive 認証用 (ダウンロードで使用)
-    sa_key_string = os.environ['GCP_SA_KEY']
-    sa_key_json = json.loads(sa_key_string)
-    
-    # 2. フォルダID
-    TARGET_EXCEL_FOLDER_ID = os.environ['INPUT_FOLDER_ID']
-    UPLOAD_FOLDER_ID = os.environ['OUTPUT_FOLDER_ID'] # GASに渡すフォルダID
-    
-    # 3. Excelパスワード
-    EXCEL_PASSWORD_1 = os.environ['EXCEL_PASSWORD_1']
+@functools.lru_cache(maxsize=1)
+def _config() -> SimpleNamespace:
+    """環境変数から設定を読み込む (初回呼び出し時に一度だけ読み込み、以降は結果を再利用する)
+
+    Raises:
+        KeyError: 必要な環境変数が設定されていない場合
+    """
+    return SimpleNamespace(
+        # 1. Google Drive 認証用 (ダウンロードで使用)
+        sa_key_json=json.loads(os.environ['GCP_SA_KEY']),
+
+        # 2. フォルダID
+        target_excel_folder_id=os.environ['INPUT_FOLDER_ID'],
+        upload_folder_id=os.environ['OUTPUT_FOLDER_ID'], # GASに渡すフォルダID
 
-    # 4. GAS Web App 連携用
-    GAS_WEB_APP_URL = os.environ['GAS_WEB_APP_URL']
-    GAS_SECRET_KEY = os.environ['GAS_SECRET_KEY'] # GASの 'SECRET_KEY' と一致させる
+        # 3. Excelパスワード
+        excel_password_1=os.environ['EXCEL_PASSWORD_1'],
 
-except KeyError as e:
-    print(f"エラー: 必要な環境変数が設定されていません: {e}")
-    # ... (エラーメッセージ) ...
-    exit(1)
+        # 4. GAS Web App 連携用
+        gas_web_app_url=os.environ['GAS_WEB_APP_URL'],
+        gas_secret_key=os.environ['GAS_SECRET_KEY'], # GASの 'SECRET_KEY' と一致させる
+
+        # 5. 前回処理したファイルの情報を保存する場所 (任意。GitHub Actionsのキャッシュで実行間に引き継ぐ)
+        state_file=os.path.expanduser(
+            os.environ.get('STATE_FILE', '~/.cache/process_drive_excel/state.json')),
+    )
 
 # Google APIのスコープ (Driveの読み取りのみ)
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
-
-# 3. パスワード付きExcelを読み込む関数 (変更なし)
-def load_locked_excel(buffer: io.BytesIO, sheet_name: str, password: str) -> pd.DataFrame:
-    # ... (変更なし) ...
+# 処理対象のシート名
+SHEET_NAMES = ["H1(2028卒)", "H2(2027卒)", "H3(2026卒)"]
+
+# アクセストークン更新・Driveからのダウンロード用の再試行設定
+# 一時的なエラー (429/5xx) は Retry-After を尊重しつつ、ジッター付きの指数バックオフで再試行する
+RETRY = Retry(
+    total=3,
+    backoff_factor=2,
+    backoff_jitter=1.0,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,  # 再試行しきった場合は最後のレスポンスを返し、raise_for_status() で扱う
+)
+
+# アクセストークン更新用のHTTPセッション (接続を再利用する)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(max_retries=RETRY))
+
+# GAS Web App 呼び出し用の再試行設定
+# GASの doPost はDriveにファイルを作成するため冪等ではない。リクエストがGASに届く前の失敗
+# (接続エラー) と、実行前に拒否されたことが確実な 429 だけを再試行し、読み取りタイムアウトや
+# 5xx では同じCSVを重複してアップロードしないよう再試行しない
+GAS_RETRY = Retry(
+    total=3,
+    read=0,
+    backoff_factor=2,
+    backoff_jitter=1.0,
+    status_forcelist=(429,),
+    allowed_methods=frozenset({"GET", "POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+# GAS Web App 呼び出し用のHTTPセッション (接続を再利用する)
+# GASはscript.google.comからscript.googleusercontent.comへリダイレクトするため、ホストごとに接続をプールする。
+# 各ホストのプールは、シートを並行アップロードするスレッド数分の接続を保持できるようにする
+GAS_SESSION = requests.Session()
+GAS_SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=len(SHEET_NAMES), max_retries=GAS_RETRY))
+
+
+class _BytesSink:
+    """書き込まれたバイト列をコピーせずにそのまま保持する、書き込み専用のファイル風オブジェクト"""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(data)
+        return len(data)
+
+    def getvalue(self) -> bytes:
+        # msoffcrypto は復号結果を1回で書き込むため、join は実質コピーなしで済む
+        return b"".join(self.chunks)
+
+
+# 3. パスワード付きExcelを復号する関数
+def decrypt_to_bytes(buffer: io.BytesIO, password: str) -> bytes | None:
+    """パスワード付きExcelを復号し、復号済みのバイト列として返す"""
     try:
         office_file = msoffcrypto.OfficeFile(buffer)
         office_file.load_key(password=password)
-        decrypted_buffer = io.BytesIO()
-        office_file.decrypt(decrypted_buffer)
-        decrypted_buffer.seek(0)
-        df: pd.DataFrame = pd.read_excel(
-            decrypted_buffer, sheet_name=sheet_name, engine="openpyxl"
-        )
+        sink = _BytesSink()
+        office_file.decrypt(sink)
+        decrypted_data = sink.getvalue()
     except Exception as e:
         print(f"Error loading the locked Excel file: {e}")
         if "Decryption failed" in str(e) or "bad decrypt" in str(e):
             print(">>> パスワードが間違っているか、ファイル形式がサポートされていません。")
-        return pd.DataFrame()
-    return df
+        return None
+    return decrypted_data
+
+
+def _convert_cell(value):
+    """セルの値をCSV出力用に変換する (pandas.read_excel と同じ扱い)
+
+    空セル ('') は None に、整数値のfloatはintに、日付のみの値は0時0分のdatetimeに戻す。
+    """
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+
+def _header_names(header: list) -> list:
+    """ヘッダー行を pandas.read_excel と同じ列名にする
+
+    空のセルは 'Unnamed: 列番号' に、重複した列名は 'a.1', 'a.2' のように連番を付けて区別する。
+    """
+    names = [f"Unnamed: {i}" if value is None else value for i, value in enumerate(header)]
+    unnamed = [i for i, value in enumerate(header) if value is None]
+    counts: dict = {}
+    # 名前のある列を先に処理し、名前の無い列の方に連番を付ける
+    for i in [i for i, value in enumerate(header) if value is not None] + unnamed:
+        name = original = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _format_columns(sheet_rows: list[list], width: int) -> None:
+    """データ行の値を、pandas.read_excel が列ごとに推定していた型での出力に揃える (sheet_rows をその場で書き換える)
+
+    - 日時だけの列で、すべて0時0分の場合は日付 (YYYY-MM-DD) のみを出力する
+    - 数値だけの列で、空セルか小数を含む場合は、整数も浮動小数点数 (2.0) として出力する
+    """
+    data_rows = sheet_rows[1:]
+    for column, values in enumerate(zip(*data_rows)):
+        types = set(map(type, values))
+        has_empty = type(None) in types
+        types.discard(type(None))
+        if types == {datetime.datetime}:
+            if all(value.time() == datetime.time() for value in values if value is not None):
+                for row in data_rows:
+                    if row[column] is not None:
+                        row[column] = row[column].date().isoformat()
+        elif types and types <= {int, float} and (has_empty or float in types):
+            for row in data_rows:
+                if row[column] is not None:
+                    row[column] = float(row[column])
+
+
+def sheet_to_csv(sheet_rows: list[list]) -> bytes:
+    """ワークシートの行をDataFrameを経由せずにCSV (UTF-8) へ書き出し、gzip圧縮したバイト列を返す
+
+    CSVはgzipストリームに直接書き込むため、圧縮前のCSV全体をメモリ上に保持しない。
+    pandas.read_excel と同様に、末尾の空セル・空行を取り除いて列数を揃え、列名と列ごとの値の書式を揃える。
+    ヘッダー行以外にデータが無い場合は空のバイト列を返す。
+    行データの複製を作らないよう、sheet_rows はその場で書き換える。
+    """
+    last_non_empty = 0
+    for i, row in enumerate(sheet_rows):
+        row[:] = [_convert_cell(value) for value in row]
+        while row and row[-1] is None:
+            row.pop()
+        if row:
+            last_non_empty = i + 1
+    del sheet_rows[last_non_empty:]
+
+    if len(sheet_rows) <= 1:
+        return b""
+
+    width = max(len(row) for row in sheet_rows)
+    for row in sheet_rows:
+        row.extend([None] * (width - len(row)))
+    sheet_rows[0] = _header_names(sheet_rows[0])
+    _format_columns(sheet_rows, width)
+
+    csv_gz_buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=csv_gz_buffer, mode='wb', compresslevel=6, mtime=0) as gz:
+        text = io.TextIOWrapper(gz, encoding='utf-8', newline='')
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerows(sheet_rows)
+        text.flush()
+        text.detach()
+    return csv_gz_buffer.getvalue()
+
+
+# ワーカープロセスで共有する復号済みExcelのバイト列
+_worker_decrypted_data: bytes = b""
+
+
+def _init_sheet_worker(decrypted_data: bytes) -> None:
+    """ワーカープロセスの初期化 (復号済みデータをタスクごとに転送せず、プロセスごとに1回だけ受け取る)"""
+    global _worker_decrypted_data
+    _worker_decrypted_data = decrypted_data
+
+
+def _sheet_to_csv_worker(sheet_name: str) -> bytes:
+    """(ワーカープロセスで実行) 復号済みExcelを開き、1シートをgzip圧縮したCSVデータに変換する"""
+    # XMLのパースはRust実装の calamine に任せる。
+    # skip_empty_area=False でA1から読み込み、先頭の空行・空列も含めてシート上の位置関係を保つ
+    workbook = CalamineWorkbook.from_filelike(io.BytesIO(_worker_decrypted_data))
+    try:
+        sheet_rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+    finally:
+        workbook.close()
+    return sheet_to_csv(sheet_rows)
+
+
+def convert_sheets_to_csv(decrypted_data: bytes, sheet_names: list[str]) -> Iterator[tuple[str, bytes | None]]:
+    """復号済みExcelの各シートを、シートごとに別プロセスで並列にgzip圧縮したCSVデータへ変換する
+
+    セル値の変換とCSVの書き出しは純Pythonで GIL を手放さないため、スレッドではなくプロセスで並列化する。
+    変換が終わったシートから順に (シート名, CSVデータ) を返す。
+    データが空のシートは空のバイト列を、変換に失敗したシート (ワーカープロセスの異常終了を含む) は None を返す。
+    """
+    with ProcessPoolExecutor(
+        max_workers=len(sheet_names),
+        initializer=_init_sheet_worker,
+        initargs=(decrypted_data,),
+    ) as executor:
+        futures = {executor.submit(_sheet_to_csv_worker, sheet_name): sheet_name for sheet_name in sheet_names}
+        for future in as_completed(futures):
+            sheet_name = futures[future]
+            try:
+                csv_data_gz = future.result()
+            except Exception as e:
+                _print_sheet_log(sheet_name, f"Error reading the Excel sheet: {e}")
+                csv_data_gz = None
+            yield sheet_name, csv_data_gz
 
 
 def output_secure_date() -> str:
-    # ... (変更なし) ...
     today = datetime.date.today()
     return today.strftime("%y%m%d")
 
 
-def build_drive_service(sa_key_json: dict, scopes: list):
-    """Google Drive APIの認証を行い、サービスオブジェクトを構築する"""
-    creds = service_account.Credentials.from_service_account_info(
-        sa_key_json, scopes=scopes)  
-    service = build('drive', 'v3', credentials=creds)
-    
-    return service
+@functools.lru_cache(maxsize=1)
+def _get_drive_credentials() -> service_account.Credentials:
+    """Google Drive APIの認証情報を作成する (プロセス内で一度だけ作成し、以降は再利用する)"""
+    return service_account.Credentials.from_service_account_info(
+        _config().sa_key_json, scopes=SCOPES)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_drive_service():
+    """Google Drive APIのサービスオブジェクトを構築する (プロセス内で一度だけ構築し、以降は再利用する)"""
+    # ライブラリ同梱のディスカバリードキュメントを使い、起動時の取得リクエストを省く
+    return build('drive', 'v3', credentials=_get_drive_credentials(),
+                 static_discovery=True, cache_discovery=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_drive_session() -> AuthorizedSession:
+    """Driveからのダウンロード用の認証付きHTTPセッションを作成する (プロセス内で一度だけ作成し、以降は再利用する)
+
+    アクセストークンの取得・更新は SESSION の接続プールを使い、401 が返った場合は自動で更新して再試行する。
+    """
+    session = AuthorizedSession(_get_drive_credentials(), auth_request=GoogleAuthRequest(SESSION))
+    session.mount("https://", HTTPAdapter(max_retries=RETRY))
+    return session
 
 
 def find_latest_file(service, folder_id: str, prefix: str) -> dict[str,str]:
@@ -81,9 +302,12 @@ def find_latest_file(service, folder_id: str, prefix: str) -> dict[str,str]:
     results = service.files().list(
         q=query,
         pageSize=1,
-        orderBy='modifiedTime desc', 
-        fields='files(id, name, modifiedTime)'
-    ).execute()
+        orderBy='modifiedTime desc',
+        fields='files(id, name, modifiedTime, md5Checksum, size)',
+        # 共有ドライブ上のフォルダも1回のリクエストで検索できるようにする
+        supportsAllDrives=True,
+        includeItemsFromAllDrives=True,
+    ).execute(num_retries=5)  # 一時的なエラーはライブラリの指数バックオフで再試行する
     
     items = results.get('files', [])
     if not items:
@@ -92,29 +316,49 @@ def find_latest_file(service, folder_id: str, prefix: str) -> dict[str,str]:
     return items[0]
 
 
-def download_drive_file(service, file_id: str, file_name: str) -> io.BytesIO:
-    """ファイルをダウンロードし、メモリ上のBytesIOバッファとして返す"""
-    request = service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while done is False:
-        status, done = downloader.next_chunk()
-        print(f"ダウンロード中 {int(status.progress() * 100)}%")
+def download_drive_file(session: AuthorizedSession, file_id: str, size: int = 0) -> io.BytesIO:
+    """ファイルをダウンロードし、メモリ上のBytesIOバッファとして返す
 
+    alt=media の1回のGETをストリーミングで受け取る。
+    size (Driveのメタデータのファイルサイズ) を渡すと、バッファをその大きさで確保してから書き込む。
+    """
+    fh = io.BytesIO()
+    if size > 0:
+        # 末尾に1バイト書き込んで一度だけ領域を確保し、チャンクごとの再確保とコピーを避ける
+        fh.seek(size - 1)
+        fh.write(b'\0')
+        fh.seek(0)
+
+    with session.get(
+        f"https://www.googleapis.com/drive/v3/files/{file_id}",
+        params={"alt": "media", "supportsAllDrives": "true"},
+        stream=True,
+        timeout=120,
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=1 << 20):
+            fh.write(chunk)
+
+    fh.truncate()  # 実際のサイズが小さかった場合に備えて、書き込んだ位置で切り詰める
+    print(f"ダウンロード完了 ({fh.tell()} バイト)")
     return fh
 
 
 def main():
     """メインの処理を実行する関数"""
-    
+    try:
+        cfg = _config()
+    except KeyError as e:
+        print(f"エラー: 必要な環境変数が設定されていません: {e}")
+        exit(1)
+
     # 1. 【準備】認証とサービスの準備
     print("Google Driveに認証中 (ダウンロード用)...")
-    service = build_drive_service(sa_key_json, SCOPES)
+    service = _get_drive_service()
 
     # 2. 【準備】指定したフォルダ内の最新ファイルを取得
     FILE_PREFIX = "東大特進入学＆資料請求"
-    latest_file = find_latest_file(service, TARGET_EXCEL_FOLDER_ID, FILE_PREFIX)
+    latest_file = find_latest_file(service, cfg.target_excel_folder_id, FILE_PREFIX)
     if not latest_file:
         print("最新のファイルが見つかりませんでした。処理を終了します。")
         return
@@ -124,110 +368,198 @@ def main():
     stored_time = latest_file['modifiedTime']
     print(f"最新ファイルが見つかりました: '{file_name}' (更新日時: {stored_time})")
 
+    # 前回処理したファイルと内容が同じなら、ダウンロード以降の処理をすべて省く
+    md5_checksum = latest_file.get('md5Checksum', '')
+    last_state = load_state(cfg.state_file)
+    if md5_checksum and md5_checksum == last_state.get('md5Checksum'):
+        print(f"前回処理したファイルから変更がありません (MD5: {md5_checksum})。処理をスキップします。")
+        return
+
     # 3. 【準備】ファイルをダウンロードしてExcelデータを読み込む
-    fh = download_drive_file(service, file_id, file_name)
+    fh = download_drive_file(_get_drive_session(), file_id, size=int(latest_file.get('size', 0)))
 
-    # 4. 【実行】各シートを読み込み、CSVデータを生成してGASにアップロード
-    print("PandasでExcelデータを読み込み中...")
+    # 4. 【実行】ファイルを一度だけ復号し、全シートをCSVデータに変換する
+    print("Excelデータを読み込み中...")
     file_name_without_extension = file_name.replace('.xlsx', '')
-    
-    for sheet_name in ["H1(2028卒)", "H2(2027卒)", "H3(2026卒)"]:
-        print(f"-> シート名: {sheet_name}")
-        fh.seek(0)  # バッファの先頭に戻る
-        
-        df: pd.DataFrame = load_locked_excel(fh, sheet_name=sheet_name, password=EXCEL_PASSWORD_1)
-        
-        if df.empty:
-            print("Excelデータの読み込みに失敗したか、データが空です。処理を終了します。")
-            continue
-        print("Excelデータの読み込み完了。")
-
-        output_filename = f"{output_secure_date()}/secure-{output_secure_date()}_{file_name_without_extension}_{sheet_name}.csv"
-        print(f"'{output_filename}' のCSVデータをメモリ上に生成しました。")
-        csv_data_string = df.to_csv(index=False, encoding='utf-8-sig')
-
-
-        # 6. 【出力】GAS Web Appを呼び出す
-        success = upload_csv_to_gas(
-            csv_data=csv_data_string,
-            file_path=output_filename,
-            folder_id=UPLOAD_FOLDER_ID,
-            gas_url=GAS_WEB_APP_URL,
-            gas_key=GAS_SECRET_KEY
-        )
-        
-        if success:
-            print("処理が正常に完了しました。")
-        else:
-            print("処理中にエラーが発生しました。")
-            exit(1)
+    output_date = output_secure_date()  # 全シートで同じ日付を使う (日付をまたいでもフォルダが分かれないようにする)
+
+    fh.seek(0)  # バッファの先頭に戻る
+    decrypted_data = decrypt_to_bytes(fh, password=cfg.excel_password_1)
+    fh.close()  # 暗号化されたままのデータは以降使わないので、アップロード中まで保持せずに解放する
+    if decrypted_data is None:
+        print("Excelファイルの復号に失敗しました。処理を終了します。")
+        return
+
+    # 5. 【実行】各シートのCSVデータをGASにアップロード
+    # アップロードはGASの応答待ちが大半なので、変換が終わったシートから順にスレッドで並行して送信し、
+    # 残りのシートの変換と重ね合わせる
+    with ThreadPoolExecutor(max_workers=len(SHEET_NAMES)) as executor:
+        futures = {
+            sheet_name: executor.submit(process_one_sheet, sheet_name, csv_data_gz, file_name_without_extension, output_date)
+            for sheet_name, csv_data_gz in convert_sheets_to_csv(decrypted_data, SHEET_NAMES)
+        }
+        results = {sheet_name: future.result() for sheet_name, future in futures.items()}
+
+    # 対象のシートがすべて変換・アップロードされた場合のみ成功とする
+    if set(results) != set(SHEET_NAMES) or not all(results.values()):
+        print("処理中にエラーが発生しました。")
+        exit(1)
+
+    # 次回の実行で変更の有無を判定できるよう、処理したファイルの情報を保存する
+    # (失敗したシートがある場合は上で終了しているため、次回の実行で再処理される)
+    save_state(cfg.state_file, latest_file)
+
+
+def load_state(path: str) -> dict:
+    """前回処理したファイルの情報を読み込む (ファイルが無い・壊れている場合は空のdictを返す)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(path: str, state: dict) -> None:
+    """処理したファイルの情報を保存する"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+
+
+def _print_sheet_log(sheet_name: str, *lines: str) -> None:
+    """各行の先頭にシート名を付けてログを出力する
+
+    シートは複数のスレッドで並行して処理するため、複数行のログも1回の書き込みでまとめて出力し、
+    他のシートのログと行が混ざらないようにする。
+    """
+    print("".join(f"[{sheet_name}] {line}\n" for line in lines), end="", flush=True)
+
+
+def process_one_sheet(sheet_name: str, csv_data_gz: bytes | None, file_name_without_extension: str, output_date: str) -> bool:
+    """1シート分のCSVデータをGASにアップロードする
+
+    データが空のシートはアップロードせずに成功として扱い、変換に失敗したシート (None) は失敗として扱う。
+    """
+    if csv_data_gz is None:
+        _print_sheet_log(sheet_name, "Excelデータの読み込みに失敗しました。")
+        return False
+    if not csv_data_gz:
+        _print_sheet_log(sheet_name, "Excelデータが空です。スキップします。")
+        return True
+
+    output_filename = f"{output_date}/secure-{output_date}_{file_name_without_extension}_{sheet_name}.csv"
+    _print_sheet_log(
+        sheet_name,
+        "Excelデータの読み込み完了。",
+        f"'{output_filename}' のCSVデータをメモリ上に生成しました。",
+    )
+
+    # 6. 【出力】GAS Web Appを呼び出す
+    cfg = _config()
+    success = upload_csv_to_gas(
+        csv_data_gz=csv_data_gz,
+        file_path=output_filename,
+        folder_id=cfg.upload_folder_id,
+        gas_url=cfg.gas_web_app_url,
+        gas_key=cfg.gas_secret_key,
+        sheet_name=sheet_name,
+    )
+
+    if success:
+        _print_sheet_log(sheet_name, "処理が正常に完了しました。")
+    else:
+        _print_sheet_log(sheet_name, "処理中にエラーが発生しました。")
+    return success
 
 
 def upload_csv_to_gas(
-    csv_data: str,
+    csv_data_gz: bytes,
     file_path: str,
     folder_id: str,
     gas_url: str,
-    gas_key: str
+    gas_key: str,
+    sheet_name: str,
 ) -> bool:
     """csvデータをGAS Web AppにPOSTリクエストで送信し、Driveにアップロードする.
+
+    gzip圧縮済みのcsvデータをBase64エンコードし、`csvDataGz` として送信する。
     
     Args:
-        csv_data (str): アップロードするcsvデータの文字列
+        csv_data_gz (bytes): アップロードするcsvデータ (UTF-8をgzip圧縮したバイト列)
         file_path (str): GAS側で解釈されるファイルパス
         folder_id (str): Driveの親フォルダID
         gas_url (str): GAS Web AppのデプロイURL
         gas_key (str): GASと共有するシークレットキー
+        sheet_name (str): ログの各行の先頭に付けるシート名
 
     Returns:
         bool: アップロードが成功したかどうか
     """
-    print("Google Apps Script Webアプリにアップロード中...")
-    print(f"-> フォルダID: {folder_id}")
-    print(f"-> ファイル名: {file_path}")
+    _print_sheet_log(
+        sheet_name,
+        "Google Apps Script Webアプリにアップロード中...",
+        f"-> フォルダID: {folder_id}",
+        f"-> ファイル名: {file_path}",
+    )
     
     # GASが受け取るペイロードを定義
+    # CSVはテキストなので圧縮が効く。gzipで送信量とGAS側のJSONパース時間を削減する
     payload = {
         "apiKey": gas_key,
         "folderId": folder_id,
         "filePath": file_path,
-        "csvData": csv_data
+        "csvDataGz": base64.b64encode(csv_data_gz).decode("ascii")
     }
     
     try:
-        response = requests.post(gas_url, json=payload, timeout=120)
+        response = GAS_SESSION.post(gas_url, json=payload, timeout=120)
         response.raise_for_status()  # HTTPエラーがあれば例外を発生させる
         response_json = response.json()
 
         if response_json.get("status") == "success":
-            print("\n--- アップロード成功 ---")
-            print(f"ファイルID: {response_json.get('fileId')}")
-            print(f"ファイルURL: {response_json.get('fileUrl')}")
+            _print_sheet_log(
+                sheet_name,
+                "--- アップロード成功 ---",
+                f"ファイルID: {response_json.get('fileId')}",
+                f"ファイルURL: {response_json.get('fileUrl')}",
+            )
             return True
         else:
-            print("\n--- アップロード失敗 (GASがエラーを報告) ---")
-            print(f"メッセージ: {response_json.get('message')}")
-            print(f"GASからの詳細: {response_json}")
+            _print_sheet_log(
+                sheet_name,
+                "--- アップロード失敗 (GASがエラーを報告) ---",
+                f"メッセージ: {response_json.get('message')}",
+                f"GASからの詳細: {response_json}",
+            )
             return False
 
     except requests.exceptions.JSONDecodeError as e:
-        print("\n--- 致命的エラー: GASからのレスポンスがJSONではありませんでした。 ---")
-        print(f"URL: {gas_url}")
-        print(f"エラー: {e}")
-        print(f"受け取ったレスポンス (生テキスト): {response.text[:1000]}...")
-        print("\n>>> GASのデプロイ設定('全員'にアクセス許可)が正しいか確認してください。")
+        _print_sheet_log(
+            sheet_name,
+            "--- 致命的エラー: GASからのレスポンスがJSONではありませんでした。 ---",
+            f"URL: {gas_url}",
+            f"エラー: {e}",
+            f"受け取ったレスポンス (生テキスト): {response.text[:1000]}...",
+            ">>> GASのデプロイ設定('全員'にアクセス許可)が正しいか確認してください。",
+        )
         return False
 
     except requests.exceptions.RequestException as e:
-        print(f"\n--- 致命的エラー: GAS Webアプリの呼び出しに失敗しました。 ---")
-        print(f"URL: {gas_url}")
-        print(f"エラー: {e}")
-        if e.response:
-            print(f"ステータスコード: {e.response.status_code}")
-            print(f"レスポンス: {e.response.text[:1000]}...")
-        print("\n>>> GASのURL、ネットワーク設定、またはGAS側のタイムアウトを確認してください。")
+        lines = [
+            "--- 致命的エラー: GAS Webアプリの呼び出しに失敗しました。 ---",
+            f"URL: {gas_url}",
+            f"エラー: {e}",
+        ]
+        if e.response is not None:  # エラー応答 (4xx/5xx) の Response は偽と評価されるため、None と比較する
+            lines += [
+                f"ステータスコード: {e.response.status_code}",
+                f"レスポンス: {e.response.text[:1000]}...",
+            ]
+        lines.append(">>> GASのURL、ネットワーク設定、またはGAS側のタイムアウトを確認してください。")
+        _print_sheet_log(sheet_name, *lines)
         return False
-    
+
 
 if __name__ == '__main__':
     main()
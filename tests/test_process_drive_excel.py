@@ -0,0 +1,171 @@
+"""process_drive_excel のCSV変換 (_convert_cell / sheet_to_csv) の出力仕様のテスト
+
+リポジトリのルートで `python -m pytest` を実行する。
+"""
+import datetime
+import gzip
+
+from process_drive_excel import _convert_cell, sheet_to_csv
+
+
+def _csv_text(sheet_rows: list[list]) -> str:
+    """sheet_to_csv の出力を展開してCSVの文字列として返す"""
+    return gzip.decompress(sheet_to_csv(sheet_rows)).decode("utf-8")
+
+
+def test_convert_cell_empty_string_is_none():
+    assert _convert_cell("") is None
+
+
+def test_convert_cell_integral_float_is_int():
+    assert _convert_cell(1000.0) == 1000
+    assert isinstance(_convert_cell(1000.0), int)
+    assert _convert_cell(1.5) == 1.5
+
+
+def test_convert_cell_date_becomes_midnight_datetime():
+    assert _convert_cell(datetime.date(2026, 4, 1)) == datetime.datetime(2026, 4, 1)
+    value = datetime.datetime(2026, 4, 1, 9, 30)
+    assert _convert_cell(value) == value
+
+
+def test_convert_cell_other_values_unchanged():
+    assert _convert_cell("山田") == "山田"
+    assert _convert_cell(True) is True
+    assert _convert_cell(None) is None
+
+
+def test_trailing_empty_cells_and_rows_are_trimmed():
+    rows = [
+        ["会員番号", "氏名", ""],
+        [1.0, "山田", ""],
+        ["", "", ""],
+        ["", "", ""],
+    ]
+    assert _csv_text(rows) == "会員番号,氏名\n1,山田\n"
+
+
+def test_blank_rows_inside_data_are_kept_and_rows_padded():
+    rows = [
+        ["会員番号", "氏名", "備考"],
+        ["", "", ""],
+        [2.0, "佐藤"],
+        [3.0],
+    ]
+    # 空セルを含む数値の列は、pandas と同じく浮動小数点数として出力する
+    assert _csv_text(rows) == "会員番号,氏名,備考\n,,\n2.0,佐藤,\n3.0,,\n"
+
+
+def test_rows_are_padded_to_widest_row():
+    rows = [
+        ["会員番号"],
+        [1.0, "山田", "メモ"],
+    ]
+    assert _csv_text(rows) == "会員番号,Unnamed: 1,Unnamed: 2\n1,山田,メモ\n"
+
+
+def test_blank_header_cells_are_named_by_position():
+    rows = [
+        ["", "氏名", ""],
+        [1.0, "山田", "メモ"],
+    ]
+    assert _csv_text(rows) == "Unnamed: 0,氏名,Unnamed: 2\n1,山田,メモ\n"
+
+
+def test_duplicate_headers_are_numbered():
+    rows = [
+        ["氏名", "氏名", "氏名.1", "氏名", 2026.0],
+        ["a", "b", "c", "d", "e"],
+    ]
+    assert _csv_text(rows) == "氏名,氏名.2,氏名.1,氏名.3,2026\na,b,c,d,e\n"
+
+
+def test_header_only_sheet_is_empty():
+    assert sheet_to_csv([["会員番号", "氏名"], ["", ""]]) == b""
+
+
+def test_empty_sheet_is_empty():
+    assert sheet_to_csv([]) == b""
+    assert sheet_to_csv([["", ""], ["", ""]]) == b""
+
+
+def test_number_and_date_formatting():
+    rows = [
+        ["会員番号", "点数", "登録日", "更新日時"],
+        [1000.0, 72.5, datetime.date(2026, 4, 1), datetime.datetime(2026, 4, 1, 9, 30, 15)],
+    ]
+    assert _csv_text(rows) == (
+        "会員番号,点数,登録日,更新日時\n"
+        "1000,72.5,2026-04-01,2026-04-01 09:30:15\n"
+    )
+
+
+def test_date_column_all_midnight_is_written_as_date():
+    rows = [
+        ["登録日"],
+        [datetime.date(2026, 4, 1)],
+        [""],
+        [datetime.datetime(2026, 4, 2)],
+    ]
+    assert _csv_text(rows) == '登録日\n2026-04-01\n""\n2026-04-02\n'
+
+
+def test_date_column_with_time_keeps_time_for_every_row():
+    rows = [
+        ["更新日時"],
+        [datetime.datetime(2026, 4, 1, 9, 30)],
+        [datetime.date(2026, 4, 2)],
+    ]
+    assert _csv_text(rows) == "更新日時\n2026-04-01 09:30:00\n2026-04-02 00:00:00\n"
+
+
+def test_date_in_mixed_column_keeps_time():
+    rows = [
+        ["登録日"],
+        [datetime.date(2026, 4, 1)],
+        ["未定"],
+    ]
+    assert _csv_text(rows) == "登録日\n2026-04-01 00:00:00\n未定\n"
+
+
+def test_float_column_writes_integral_values_as_float():
+    rows = [
+        ["点数"],
+        [2.0],
+        [2.5],
+        [1e16],
+    ]
+    assert _csv_text(rows) == "点数\n2.0\n2.5\n1e+16\n"
+
+
+def test_int_column_without_blanks_is_written_as_int():
+    rows = [
+        ["会員番号", "氏名"],
+        [1000.0, "山田"],
+        [1001.0, "佐藤"],
+    ]
+    assert _csv_text(rows) == "会員番号,氏名\n1000,山田\n1001,佐藤\n"
+
+
+def test_mixed_column_keeps_each_value_format():
+    rows = [
+        ["備考"],
+        [1.0],
+        ["a"],
+        [2.5],
+        [True],
+    ]
+    assert _csv_text(rows) == "備考\n1\na\n2.5\nTrue\n"
+
+
+def test_values_needing_quotes():
+    rows = [
+        ["氏名", "備考"],
+        ["山田, 太郎", '"A"\n組'],
+    ]
+    assert _csv_text(rows) == '氏名,備考\n"山田, 太郎","""A""\n組"\n'
+
+
+def test_output_is_deterministic_gzip():
+    # mtime=0 で書き出すため、同じ内容なら実行時刻によらず同じバイト列になる
+    assert sheet_to_csv([["a", "b"], [1.0, 2.0]]) == sheet_to_csv([["a", "b"], [1.0, 2.0]])
@@ -0,0 +1,178 @@
+"""process_drive_excel の前回処理したファイルの記録と、変更が無い場合のスキップのテスト"""
+import io
+import json
+
+import pytest
+import requests
+
+import process_drive_excel
+
+LATEST_FILE = {
+    "id": "file-id",
+    "name": "東大特進入学＆資料請求.xlsx",
+    "modifiedTime": "2026-04-01T00:00:00.000Z",
+    "md5Checksum": "md5-new",
+    "size": "3",
+}
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    """環境変数と Drive・復号をモックし、状態ファイルのパスを返す"""
+    path = tmp_path / "state" / "state.json"
+    for name, value in {
+        "GCP_SA_KEY": "{}",
+        "INPUT_FOLDER_ID": "in",
+        "OUTPUT_FOLDER_ID": "out",
+        "EXCEL_PASSWORD_1": "pw",
+        "GAS_WEB_APP_URL": "https://script.google.com/macros/s/test/exec",
+        "GAS_SECRET_KEY": "key",
+        "STATE_FILE": str(path),
+    }.items():
+        monkeypatch.setenv(name, value)
+    process_drive_excel._config.cache_clear()
+    monkeypatch.setattr(process_drive_excel, "_get_drive_service", lambda: None)
+    monkeypatch.setattr(process_drive_excel, "_get_drive_session", lambda: None)
+    monkeypatch.setattr(process_drive_excel, "find_latest_file", lambda *args: dict(LATEST_FILE))
+    monkeypatch.setattr(process_drive_excel, "decrypt_to_bytes", lambda buffer, password: b"xlsx")
+    yield path
+    process_drive_excel._config.cache_clear()
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """ダウンロードの呼び出しを記録する"""
+    calls = []
+
+    def download_drive_file(session, file_id, size=0):
+        calls.append(file_id)
+        return io.BytesIO(b"enc")
+
+    monkeypatch.setattr(process_drive_excel, "download_drive_file", download_drive_file)
+    return calls
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """GASへのPOSTを記録し、成功のレスポンスを返す"""
+    calls = []
+
+    def post(url, json=None, timeout=None):
+        calls.append(json["filePath"])
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"status": "success"}'
+        return response
+
+    monkeypatch.setattr(process_drive_excel.GAS_SESSION, "post", post)
+    return calls
+
+
+def _convert_to(monkeypatch, results: dict):
+    """シートの変換結果を results に差し替える"""
+    monkeypatch.setattr(
+        process_drive_excel, "convert_sheets_to_csv",
+        lambda decrypted_data, sheet_names: iter(results.items()),
+    )
+
+
+def test_unchanged_file_is_skipped(state_file, downloads, posts):
+    process_drive_excel.save_state(str(state_file), LATEST_FILE)
+
+    process_drive_excel.main()
+
+    assert downloads == []
+    assert posts == []
+
+
+def test_state_is_written_when_all_sheets_succeed(state_file, downloads, posts, monkeypatch):
+    process_drive_excel.save_state(str(state_file), {**LATEST_FILE, "md5Checksum": "md5-old"})
+    _convert_to(monkeypatch, {sheet_name: b"csv" for sheet_name in process_drive_excel.SHEET_NAMES})
+
+    process_drive_excel.main()
+
+    assert downloads == ["file-id"]
+    assert len(posts) == len(process_drive_excel.SHEET_NAMES)
+    assert json.loads(state_file.read_text(encoding="utf-8"))["md5Checksum"] == "md5-new"
+
+
+def test_empty_sheet_counts_as_success(state_file, downloads, posts, monkeypatch):
+    results = {sheet_name: b"csv" for sheet_name in process_drive_excel.SHEET_NAMES}
+    results[process_drive_excel.SHEET_NAMES[0]] = b""
+    _convert_to(monkeypatch, results)
+
+    process_drive_excel.main()
+
+    assert len(posts) == len(process_drive_excel.SHEET_NAMES) - 1
+    assert process_drive_excel.load_state(str(state_file))["md5Checksum"] == "md5-new"
+
+
+def test_state_is_not_written_when_a_sheet_fails(state_file, downloads, posts, monkeypatch):
+    results = {sheet_name: b"csv" for sheet_name in process_drive_excel.SHEET_NAMES}
+    results[process_drive_excel.SHEET_NAMES[1]] = None
+    _convert_to(monkeypatch, results)
+
+    with pytest.raises(SystemExit) as exc_info:
+        process_drive_excel.main()
+
+    assert exc_info.value.code == 1
+    assert not state_file.exists()
+
+
+def test_state_is_not_written_when_a_sheet_is_missing(state_file, downloads, posts, monkeypatch):
+    _convert_to(monkeypatch, {sheet_name: b"csv" for sheet_name in process_drive_excel.SHEET_NAMES[:-1]})
+
+    with pytest.raises(SystemExit) as exc_info:
+        process_drive_excel.main()
+
+    assert exc_info.value.code == 1
+    assert not state_file.exists()
+
+
+def test_state_is_not_written_when_an_upload_fails(state_file, downloads, monkeypatch):
+    _convert_to(monkeypatch, {sheet_name: b"csv" for sheet_name in process_drive_excel.SHEET_NAMES})
+
+    def post(url, json=None, timeout=None):
+        response = requests.Response()
+        response.status_code = 200
+        status = "error" if json["filePath"].endswith(f"_{process_drive_excel.SHEET_NAMES[2]}.csv") else "success"
+        response._content = f'{{"status": "{status}"}}'.encode()
+        return response
+
+    monkeypatch.setattr(process_drive_excel.GAS_SESSION, "post", post)
+
+    with pytest.raises(SystemExit) as exc_info:
+        process_drive_excel.main()
+
+    assert exc_info.value.code == 1
+    assert not state_file.exists()
+
+
+def test_previous_state_is_kept_when_a_sheet_fails(state_file, downloads, posts, monkeypatch):
+    process_drive_excel.save_state(str(state_file), {**LATEST_FILE, "md5Checksum": "md5-old"})
+    _convert_to(monkeypatch, {sheet_name: None for sheet_name in process_drive_excel.SHEET_NAMES})
+
+    with pytest.raises(SystemExit):
+        process_drive_excel.main()
+
+    assert process_drive_excel.load_state(str(state_file))["md5Checksum"] == "md5-old"
+
+
+@pytest.mark.parametrize("content", ["", "{broken", "[]", "null", '"md5"'])
+def test_load_state_returns_empty_dict_for_invalid_file(tmp_path, content):
+    path = tmp_path / "state.json"
+    path.write_text(content, encoding="utf-8")
+
+    assert process_drive_excel.load_state(str(path)) == {}
+
+
+def test_load_state_returns_empty_dict_for_missing_file(tmp_path):
+    assert process_drive_excel.load_state(str(tmp_path / "missing.json")) == {}
+
+
+def test_save_state_round_trip(tmp_path):
+    path = str(tmp_path / "nested" / "state.json")
+
+    process_drive_excel.save_state(path, LATEST_FILE)
+
+    assert process_drive_excel.load_state(path) == LATEST_FILE
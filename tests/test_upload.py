@@ -0,0 +1,106 @@
+"""process_drive_excel のGASへのアップロード (upload_csv_to_gas) と再試行設定のテスト"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ProtocolError, ReadTimeoutError
+
+import process_drive_excel
+
+GAS_URL = "https://script.google.com/macros/s/test/exec"
+
+
+def _response(status_code: int, body: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = GAS_URL
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+def _upload(sheet_name: str) -> bool:
+    return process_drive_excel.upload_csv_to_gas(
+        csv_data_gz=b"csv",
+        file_path=f"260401/secure-260401_test_{sheet_name}.csv",
+        folder_id="folder",
+        gas_url=GAS_URL,
+        gas_key="key",
+        sheet_name=sheet_name,
+    )
+
+
+@pytest.mark.parametrize(
+    ("response", "expected"),
+    [
+        (_response(200, {"status": "success", "fileId": "1", "fileUrl": "u"}), True),
+        (_response(200, {"status": "error", "message": "denied"}), False),
+        (_response(500, {}), False),
+    ],
+)
+def test_every_log_line_has_sheet_name(monkeypatch, capsys, response, expected):
+    monkeypatch.setattr(process_drive_excel.GAS_SESSION, "post", lambda *args, **kwargs: response)
+
+    assert _upload("H1(2028卒)") is expected
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines
+    assert all(line.startswith("[H1(2028卒)] ") for line in lines)
+
+
+def test_error_response_status_is_logged(monkeypatch, capsys):
+    monkeypatch.setattr(process_drive_excel.GAS_SESSION, "post", lambda *args, **kwargs: _response(500, {}))
+
+    _upload("H1(2028卒)")
+
+    assert "[H1(2028卒)] ステータスコード: 500" in capsys.readouterr().out
+
+
+def test_concurrent_uploads_do_not_mix_lines(monkeypatch, capsys):
+    body = {"status": "success", "fileId": "1", "fileUrl": "u"}
+    monkeypatch.setattr(process_drive_excel.GAS_SESSION, "post", lambda *args, **kwargs: _response(200, body))
+
+    sheet_names = [f"S{i}" for i in range(20)]
+    with ThreadPoolExecutor(max_workers=len(sheet_names)) as executor:
+        assert all(executor.map(_upload, sheet_names))
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(sheet_names) * 6
+    for line in lines:
+        prefix, _, message = line.partition("] ")
+        assert prefix[1:] in sheet_names
+        assert "[" not in message
+
+
+def _gas_retry():
+    return process_drive_excel.GAS_SESSION.get_adapter("https://").max_retries
+
+
+@pytest.mark.parametrize("status", [500, 502, 503, 504])
+def test_gas_post_is_not_retried_on_server_error(status):
+    # GASの doPost はファイルを作成するため、GASまで届いた可能性のあるリクエストは再送しない
+    assert not _gas_retry().is_retry("POST", status)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ReadTimeoutError(None, GAS_URL, "Read timed out."),
+        ProtocolError("Connection aborted."),
+    ],
+)
+def test_gas_post_is_not_retried_on_read_error(error):
+    with pytest.raises(MaxRetryError):
+        _gas_retry().increment("POST", GAS_URL, error=error)
+
+
+def test_gas_post_is_retried_on_rate_limit_and_connect_error():
+    retry = _gas_retry()
+    assert retry.is_retry("POST", 429)
+    assert retry.increment("POST", GAS_URL, error=ConnectTimeoutError("Connect timed out.")).total == retry.total - 1
+
+
+def test_drive_retry_policy_is_separate():
+    # トークン更新・ダウンロード用の再試行設定はGASの設定と独立している
+    assert process_drive_excel.GAS_SESSION.get_adapter("https://").max_retries is not process_drive_excel.RETRY
+    assert process_drive_excel.RETRY.is_retry("GET", 503)